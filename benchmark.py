@@ -0,0 +1,339 @@
+"""Benchmark e teste de carga dos endpoints do Bazar Tem Tudo.
+
+Gera clientes, produtos e cargas sintéticos no formato do tb_cargatmp.csv e
+mede /produto, /cliente, /carga/lote, /carga e /allTables, pelo test client
+do Flask (padrão, com banco temporário) ou por HTTP (--url) com N workers. No
+modo test client também mede a inicialização: processos novos importando o app,
+chamando cria_app() e atendendo a primeira requisição, com o schema já migrado.
+
+Exemplos:
+    python benchmark.py --escala 10000 --workers 4 --saida base.json
+    python benchmark.py --escala 100000 --saida novo.json --compara base.json
+    python benchmark.py --url http://localhost:5000 --escala 10000 --workers 8
+    python benchmark.py --escala 1000000 --csv carga_1m.csv   # só gera o CSV
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+COLUNAS_CSV = (
+    "pedido_id", "item_pedido_id", "data_compra", "data_pagamento", "cliente_email", "cliente_nome",
+    "cliente_cpf", "cliente_celular", "produto_sku", "produto_nome", "quantidade_comprada",
+    "moedaUtilizada", "item_pedido_preco", "tipo_entrega", "destinatario_nome", "endereco_entrega",
+    "cidade_entrega", "estado_entrega", "cep_entrega", "pais_entrega",
+)
+
+def gera_cpf(numero):
+    digitos = f"{numero:011d}"
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+def gera_produtos(quantidade, estoque, semente=1):
+    aleatorio = random.Random(semente)
+    for numero in range(quantidade):
+        yield {
+            "produto_sku": f"SKU{numero:07d}",
+            "produto_nome": f"Produto {numero}",
+            "produto_estoque": estoque,
+            "produto_preco": round(aleatorio.uniform(1, 500), 2),
+        }
+
+def gera_clientes(quantidade):
+    for numero in range(quantidade):
+        yield {
+            "cliente_nome": f"Cliente {numero}",
+            "cliente_telefone": f"(11) 9{numero % 10000:04d}-{numero // 10000 % 10000:04d}",
+            "cliente_email": f"cliente{numero}@email.com",
+            "cliente_cpf": gera_cpf(numero),
+        }
+
+# Cargas com a distribuição de um marketplace: poucos SKUs concentram a maior parte das vendas
+# pedido_id distintos entre cenários: o servidor ignora pedidos repetidos
+def gera_cargas(quantidade, clientes, produtos, semente=2, primeiro_pedido=1):
+    aleatorio = random.Random(semente)
+    for numero in range(quantidade):
+        cliente = aleatorio.randrange(clientes)
+        produto = min(int(aleatorio.paretovariate(1.2)) - 1, produtos - 1)
+        dia = 1 + numero % 28
+        yield {
+            "pedido_id": primeiro_pedido + numero,
+            "cliente_cpf": gera_cpf(cliente),
+            "cliente_nome": f"Cliente {cliente}",
+            "cliente_telefone": f"(11) 9{cliente % 10000:04d}-{cliente // 10000 % 10000:04d}",
+            "cliente_email": f"cliente{cliente}@email.com",
+            "pedido_data": f"2024-05-{dia:02d}",
+            "pedido_dataPagamento": f"2024-05-{dia:02d}",
+            "produtoPedido_sku": f"SKU{produto:07d}",
+            "produtoPedido_nome": f"Produto {produto}",
+            "produto_quantidade": aleatorio.randint(1, 5),
+        }
+
+def escreve_csv(caminho, cargas):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(COLUNAS_CSV)
+        for carga in cargas:
+            escritor.writerow((
+                carga["pedido_id"], carga["pedido_id"], carga["pedido_data"] + " 09:30:00", carga["pedido_dataPagamento"] + " 09:45:00",
+                carga["cliente_email"], carga["cliente_nome"], carga["cliente_cpf"], carga["cliente_telefone"],
+                carga["produtoPedido_sku"], carga["produtoPedido_nome"], carga["produto_quantidade"], "BRL", "19.90",
+                "Entrega Padrão", carga["cliente_nome"], "Rua A numero 1", "Cidade A", "Estado A", "12345-678", "Brasil",
+            ))
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def pico_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+class ClienteTeste:
+    """Envia requisições pelo test client do Flask e conta as instruções SQL."""
+
+    def __init__(self, app, db):
+        from sqlalchemy import event
+        self.app = app
+        self.locais = threading.local()
+        self.trava = threading.Lock()
+        self.instrucoes_sql = 0
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._conta_sql)
+
+    def _conta_sql(self, *args):
+        with self.trava:
+            self.instrucoes_sql += 1
+
+    def envia(self, metodo, caminho, corpo=None):
+        if not hasattr(self.locais, "cliente"):
+            self.locais.cliente = self.app.test_client()
+        resposta = self.locais.cliente.open(caminho, method=metodo, json=corpo)
+        resposta.get_data()  # consome respostas em streaming
+        return resposta.status_code
+
+class ClienteHTTP:
+    """Envia requisições para um servidor já em execução."""
+
+    instrucoes_sql = None
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def envia(self, metodo, caminho, corpo=None):
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        requisicao = urllib.request.Request(self.url + caminho, data=dados, method=metodo,
+                                            headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(requisicao) as resposta:
+                resposta.read()
+                return resposta.status
+        except urllib.error.HTTPError as erro:
+            return erro.code
+
+# Executa as requisições com N workers e resume vazão, latências e SQL por requisição
+def mede(cliente, nome, metodo, caminho, corpos, workers, unidades=1):
+    corpos = list(corpos)
+    latencias = []
+    erros = 0
+    sql_antes = cliente.instrucoes_sql
+
+    def executa(corpo):
+        inicio = time.perf_counter()
+        status = cliente.envia(metodo, caminho, corpo)
+        return time.perf_counter() - inicio, status
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for latencia, status in executor.map(executa, corpos):
+            latencias.append(latencia * 1000)
+            erros += status >= 400
+    segundos = time.perf_counter() - inicio
+
+    resultado = {
+        "requisicoes": len(corpos),
+        "erros": erros,
+        "segundos": round(segundos, 3),
+        "requisicoes_por_segundo": round(len(corpos) / segundos, 1) if segundos else None,
+        "linhas_por_segundo": round(len(corpos) * unidades / segundos, 1) if segundos else None,
+        "latencia_ms": {
+            "p50": round(percentil(latencias, 50), 2) if latencias else None,
+            "p95": round(percentil(latencias, 95), 2) if latencias else None,
+            "p99": round(percentil(latencias, 99), 2) if latencias else None,
+            "max": round(max(latencias), 2) if latencias else None,
+        },
+        "sql_por_requisicao": None,
+        "pico_rss_mb": pico_rss_mb(),
+    }
+    if sql_antes is not None and corpos:
+        resultado["sql_por_requisicao"] = round((cliente.instrucoes_sql - sql_antes) / len(corpos), 2)
+    print(f"{nome:12} {resultado['requisicoes_por_segundo']:>10} req/s  p50 {resultado['latencia_ms']['p50']} ms  "
+          f"p99 {resultado['latencia_ms']['p99']} ms  sql/req {resultado['sql_por_requisicao']}  erros {erros}",
+          file=sys.stderr)
+    return resultado
+
+# Confere no banco que nenhuma carga concorrente vendeu estoque que não existia
+def confere_estoque(db, estoque_inicial):
+    with db.engine.connect() as conexao:
+        estoque, negativos = conexao.exec_driver_sql(
+            "SELECT COALESCE(SUM(produto_estoque), 0), SUM(produto_estoque < 0) FROM produto").one()
+        vendidos = conexao.exec_driver_sql('SELECT COALESCE(SUM(produto_quantidade), 0) FROM "produtoPedido"').scalar()
+    return {"estoque_consistente": estoque + vendidos == estoque_inicial and not negativos,
+            "estoque_restante": estoque, "unidades_vendidas": vendidos}
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# Roda em um processo novo: do import do app até a primeira resposta, como um worker WSGI subindo
+CODIGO_INICIALIZACAO = """
+import json, time
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+aplicacao = app.cria_app()
+criado = time.perf_counter()
+status = aplicacao.test_client().get("/produto/SKU0000000").status_code
+fim = time.perf_counter()
+print(json.dumps({"import_ms": (importado - inicio) * 1000, "cria_app_ms": (criado - importado) * 1000,
+                  "primeira_resposta_ms": (fim - criado) * 1000, "total_ms": (fim - inicio) * 1000, "status": status}))
+"""
+
+def mede_inicializacao(vezes):
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    ambiente = dict(os.environ, MIGRA_NA_INICIALIZACAO="0")  # como em produção: schema migrado no deploy
+    medidas = []
+    for _ in range(vezes):
+        inicio = time.perf_counter()
+        saida = subprocess.run([sys.executable, "-c", CODIGO_INICIALIZACAO], capture_output=True, text=True,
+                               cwd=diretorio, env=ambiente, check=True).stdout
+        medida = json.loads(saida.strip().splitlines()[-1])
+        medida["processo_ms"] = (time.perf_counter() - inicio) * 1000
+        medidas.append(medida)
+    resumo = {"execucoes": vezes, "status": sorted({medida["status"] for medida in medidas})}
+    for nome in ("import_ms", "cria_app_ms", "primeira_resposta_ms", "total_ms", "processo_ms"):
+        valores = [medida[nome] for medida in medidas]
+        resumo[nome] = {"p50": round(percentil(valores, 50), 1), "max": round(max(valores), 1)}
+    return resumo
+
+def executa_benchmark(args):
+    produtos = args.produtos or max(10, args.escala // 100)
+    clientes = args.clientes or max(10, args.escala // 10)
+    if args.url:
+        cliente, db = ClienteHTTP(args.url), None
+    else:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from app import app, db, migra_banco, cria_app
+        with app.app_context():
+            migra_banco()
+        cria_app()
+        cliente = ClienteTeste(app, db)
+
+    cenarios = {}
+    cenarios["produto"] = mede(cliente, "produto", "POST", "/produto",
+                               gera_produtos(produtos, args.estoque), args.workers)
+    cenarios["cliente"] = mede(cliente, "cliente", "POST", "/cliente", gera_clientes(clientes), args.workers)
+    cargas = gera_cargas(args.escala, clientes, produtos)
+    lotes = iter(lambda: [carga for _, carga in zip(range(args.tamanho_lote), cargas)], [])
+    cenarios["carga_lote"] = mede(cliente, "carga/lote", "POST", "/carga/lote", lotes, args.workers,
+                                  unidades=args.tamanho_lote)
+    cenarios["carga"] = mede(cliente, "carga", "POST", "/carga",
+                             gera_cargas(args.requisicoes, clientes, produtos, semente=3, primeiro_pedido=args.escala + 1), args.workers)
+    cenarios["allTables"] = mede(cliente, "allTables", "GET", "/allTables", [None] * args.leituras, 1)
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "modo": "http" if args.url else "test_client",
+        "parametros": {"escala": args.escala, "clientes": clientes, "produtos": produtos,
+                       "workers": args.workers, "requisicoes": args.requisicoes},
+        "cenarios": cenarios,
+        "pico_rss_mb": pico_rss_mb(),
+    }
+    if db is not None:
+        with app.app_context():
+            relatorio["estoque"] = confere_estoque(db, produtos * args.estoque)
+        if args.inicializacoes:
+            relatorio["inicializacao"] = mede_inicializacao(args.inicializacoes)
+    return relatorio
+
+# Compara com um relatório anterior; vazão menor ou latência maior além da tolerância é regressão
+def compara(relatorio, anterior, tolerancia):
+    regressoes = []
+    for nome, atual in relatorio["cenarios"].items():
+        base = anterior.get("cenarios", {}).get(nome)
+        if not base:
+            continue
+        metricas = (("requisicoes_por_segundo", atual["requisicoes_por_segundo"], base["requisicoes_por_segundo"], -1),
+                    ("p95_ms", atual["latencia_ms"]["p95"], base["latencia_ms"]["p95"], 1),
+                    ("sql_por_requisicao", atual["sql_por_requisicao"], base["sql_por_requisicao"], 1))
+        for metrica, valor, valor_base, sentido in metricas:
+            if not valor or not valor_base:
+                continue
+            variacao = (valor - valor_base) / valor_base
+            print(f"{nome:12} {metrica:24} {valor_base:>10} -> {valor:<10} {variacao:+.1%}", file=sys.stderr)
+            if variacao * sentido > tolerancia:
+                regressoes.append(f"{nome}.{metrica}")
+    atual, base = relatorio.get("inicializacao"), anterior.get("inicializacao")
+    if atual and base:
+        valor, valor_base = atual["total_ms"]["p50"], base["total_ms"]["p50"]
+        variacao = (valor - valor_base) / valor_base
+        print(f"{'inicializacao':12} {'total_ms_p50':24} {valor_base:>10} -> {valor:<10} {variacao:+.1%}", file=sys.stderr)
+        if variacao > tolerancia:
+            regressoes.append("inicializacao.total_ms")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=int, default=10000, help="Quantidade de cargas geradas (10k a 1M).")
+    parser.add_argument("--clientes", type=int, help="Clientes distintos (padrão: escala/10).")
+    parser.add_argument("--produtos", type=int, help="SKUs distintos (padrão: escala/100).")
+    parser.add_argument("--estoque", type=int, default=1000, help="Estoque inicial de cada SKU.")
+    parser.add_argument("--tamanho-lote", type=int, default=1000, help="Cargas por chamada de /carga/lote.")
+    parser.add_argument("--requisicoes", type=int, default=1000, help="Chamadas individuais de /carga.")
+    parser.add_argument("--leituras", type=int, default=3, help="Chamadas de /allTables.")
+    parser.add_argument("--workers", type=int, default=1, help="Requisições concorrentes.")
+    parser.add_argument("--inicializacoes", type=int, default=5, help="Processos novos medindo import até a primeira resposta (0 desliga).")
+    parser.add_argument("--url", help="Mede um servidor por HTTP em vez do test client.")
+    parser.add_argument("--saida", help="Arquivo JSON do relatório.")
+    parser.add_argument("--compara", help="Relatório anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora aceita antes de falhar (0.10 = 10%%).")
+    parser.add_argument("--csv", help="Só gera um arquivo no formato do tb_cargatmp.csv e sai.")
+    args = parser.parse_args()
+
+    if args.csv:
+        escreve_csv(args.csv, gera_cargas(args.escala, args.clientes or max(10, args.escala // 10),
+                                          args.produtos or max(10, args.escala // 100)))
+        return 0
+
+    relatorio = executa_benchmark(args)
+    texto = json.dumps(relatorio, indent=2, sort_keys=True)
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+    if args.compara:
+        with open(args.compara) as arquivo:
+            regressoes = compara(relatorio, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print("Regressões: " + ", ".join(regressoes), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
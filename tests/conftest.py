@@ -0,0 +1,24 @@
+# Os testes rodam contra um SQLite temporário migrado do zero. O DATABASE_URL precisa estar
+# definido antes de importar o app, que configura o banco na importação.
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'teste.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as bazar  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    with bazar.app.app_context():
+        bazar.migra_banco()
+    return bazar.app
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
@@ -0,0 +1,19 @@
+# Os planos das consultas quentes no banco migrado do zero não podem varrer tabelas inteiras
+from app import cria_indice, confere_planos, db
+
+
+def test_consultas_quentes_usam_indices(app):
+    with app.app_context():
+        assert confere_planos() == {}
+
+
+def test_confere_planos_acusa_indice_faltando(app):
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            conexao.exec_driver_sql('DROP INDEX ix_pedido_id_cliente')
+        try:
+            assert 'pedidos do cliente' in confere_planos()
+        finally:
+            with db.engine.begin() as conexao:
+                cria_indice(conexao, 'ix_pedido_id_cliente', 'pedido', ('id_cliente', 'id_pedido'))
+        assert confere_planos() == {}
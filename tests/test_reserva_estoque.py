@@ -0,0 +1,74 @@
+# Vários /carga simultâneos disputando o mesmo estoque: nenhum pode vender além do que há
+import threading
+import time
+
+from app import Produto, ProdutoPedido, ProdutoReposicao, db
+
+THREADS = 8
+PEDIDOS_POR_THREAD = 15
+ESTOQUE_INICIAL = 40
+
+
+def carga(sku, cpf, pedido_id):
+    return {
+        "pedido_id": pedido_id,
+        "cliente_cpf": cpf,
+        "cliente_nome": "Cliente " + cpf,
+        "cliente_telefone": "11999999999",
+        "cliente_email": cpf + "@teste",
+        "pedido_data": "2024-07-01",
+        "pedido_dataPagamento": "2024-07-02",
+        "produtoPedido_sku": sku,
+        "produtoPedido_nome": "Produto " + sku,
+        "produto_quantidade": 1,
+    }
+
+
+def envia_cargas(app, sku, prefixo, threads):
+    status = []
+    def envia(numero):
+        cliente = app.test_client()
+        for pedido in range(PEDIDOS_POR_THREAD):
+            resposta = cliente.post('/carga', json=carga(sku, f"{numero:011d}", f"{prefixo}-{numero}-{pedido}"))
+            status.append(resposta.status_code)
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=envia, args=(numero,)) for numero in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    return status, len(status) / (time.perf_counter() - inicio)
+
+
+def vendido_e_pendente(app, sku):
+    with app.app_context():
+        estoque = db.session.get(Produto, sku).produto_estoque
+        vendido = db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(ProdutoPedido.produto_quantidade), 0)).where(ProdutoPedido.produto_sku == sku)
+        ).scalar()
+        pendente = db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(ProdutoReposicao.produto_quantidade), 0)).where(ProdutoReposicao.produto_sku == sku)
+        ).scalar()
+    return estoque, vendido, pendente
+
+
+def test_cargas_concorrentes_nao_vendem_alem_do_estoque(app, cliente):
+    for sku in ('CONC-BASE', 'CONC'):
+        resposta = cliente.post('/produto', json={
+            "produto_sku": sku, "produto_nome": sku, "produto_estoque": ESTOQUE_INICIAL, "produto_preco": 10,
+        })
+        assert resposta.status_code == 201
+
+    # Referência: o mesmo volume enviado por uma thread só
+    status_base, vazao_base = envia_cargas(app, 'CONC-BASE', 'base', 1)
+    status, vazao = envia_cargas(app, 'CONC', 'conc', THREADS)
+
+    assert status_base == [201] * PEDIDOS_POR_THREAD
+    assert status == [201] * (THREADS * PEDIDOS_POR_THREAD)
+    estoque, vendido, pendente = vendido_e_pendente(app, 'CONC')
+    assert estoque == 0
+    assert vendido == ESTOQUE_INICIAL
+    assert pendente == THREADS * PEDIDOS_POR_THREAD - ESTOQUE_INICIAL
+    # No SQLite as escritas são serializadas: a concorrência não pode ganhar da thread única,
+    # mas também não pode desabar em esperas de lock
+    assert vazao >= vazao_base / 2, (vazao, vazao_base)